@@ -204,10 +204,11 @@ def project_create(project_name, owner_did, owner_address, supply):
         click.secho(f"Error creating project: {e}", fg="red")
 
 @project_group.command('list')
-def project_list():
+@click.option('--include-ledger', is_flag=True, default=False, help="Include each project's full token ledger.")
+def project_list(include_ledger):
     """Lists all projects."""
     try:
-        projects = project_management.list_projects()
+        projects = project_management.list_projects(include_ledger=include_ledger)
         if projects:
             print_json(projects)
         else:
@@ -386,6 +387,7 @@ def token_info():
         name = platform_token.get_token_name()
         symbol = platform_token.get_token_symbol()
         decimals = platform_token.get_token_decimals()
+        unit = platform_token.get_token_unit()
         total_supply_smallest_units = platform_token.get_total_supply()
 
         click.echo("--- $AEGIS Platform Token Information ---")
@@ -393,8 +395,8 @@ def token_info():
         click.echo(f"Symbol: {symbol if symbol else 'N/A'}")
         click.echo(f"Decimals: {decimals if decimals is not None else 'N/A'}")
 
-        if total_supply_smallest_units is not None and decimals is not None:
-            total_supply_readable = decimal.Decimal(total_supply_smallest_units) / (decimal.Decimal(10) ** decimals)
+        if total_supply_smallest_units is not None and unit is not None:
+            total_supply_readable = decimal.Decimal(total_supply_smallest_units) / unit
             click.echo(f"Total Supply: {total_supply_readable.quantize(decimal.Decimal('1.'))} {symbol if symbol else 'tokens'}")
             click.echo(f"Total Supply (smallest units): {total_supply_smallest_units}")
         else:
@@ -412,11 +414,11 @@ def token_balance(eth_address):
         return
     try:
         balance_smallest_units = platform_token.get_aegis_balance(eth_address)
-        decimals = platform_token.get_token_decimals()
+        unit = platform_token.get_token_unit()
         symbol = platform_token.get_token_symbol()
 
-        if balance_smallest_units is not None and decimals is not None:
-            balance_readable = decimal.Decimal(balance_smallest_units) / (decimal.Decimal(10) ** decimals)
+        if balance_smallest_units is not None and unit is not None:
+            balance_readable = decimal.Decimal(balance_smallest_units) / unit
             click.echo(f"Balance for {eth_address}: {balance_readable.quantize(decimal.Decimal('1.'))} {symbol if symbol else 'tokens'}")
             click.echo(f"Balance (smallest units): {balance_smallest_units}")
         else:
@@ -438,8 +440,8 @@ def token_transfer(from_address, from_pk, to_address, amount_str):
         return
     
     try:
-        decimals = platform_token.get_token_decimals()
-        if decimals is None:
+        unit = platform_token.get_token_unit()
+        if unit is None:
             click.secho("Could not retrieve token decimals. Cannot process transfer.", fg="red")
             return
 
@@ -453,7 +455,7 @@ def token_transfer(from_address, from_pk, to_address, amount_str):
             click.secho("Error: Transfer amount must be positive.", fg="red")
             return
 
-        amount_in_smallest_units = int(amount_decimal * (decimal.Decimal(10) ** decimals))
+        amount_in_smallest_units = int(amount_decimal * unit)
         click.echo(f"Attempting to transfer {amount_decimal} $AEGIS ({amount_in_smallest_units} smallest units)...")
 
         success = platform_token.transfer_aegis(
@@ -0,0 +1,165 @@
+"""
+Load test for the $AEGIS token on a local node.
+
+Many virtual users send ERC20 transfers and balanceOf calls concurrently
+over raw JSON-RPC, so Locust reports the node's p50/p95 latency and
+throughput instead of what one sequential client can drive. This is a
+benchmark, not part of the functional test suite.
+
+Usage (Ganache running, AegisToken deployed with deploy_aegis_token.py):
+
+    pip install locust
+    locust -f bench/locustfile.py --headless -u 100 -r 20 -t 1m --host http://127.0.0.1:8545
+
+Senders are the Ganache test accounts from config.py; every user sharing
+a sender draws nonces from the same in-memory counter, like a wallet. The
+constructor mints every token to account 0, so the other senders are funded
+from it when the test starts.
+
+Only the send is timed: a transfer counts as a success once the node
+accepts it, whether or not it is later mined successfully.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+
+from eth_account import Account
+from locust import HttpUser, between, events, task
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config  # noqa: E402
+
+ERC20_TRANSFER_GAS = 80_000
+# Raw token units each non-owner sender holds before the run; one per transfer
+SENDER_FUNDING = int(os.environ.get("BENCH_SENDER_FUNDING", "1000000"))
+RECIPIENT = os.environ.get("BENCH_RECIPIENT", "0x0000000000000000000000000000000000000001")
+
+_token = {"address": None, "transfer_data": None, "balance_data": None}
+_gas_price = {"value": None}
+
+
+class _Wallet:
+    """One sender account with a locally tracked nonce."""
+
+    def __init__(self, private_key: str):
+        self.account = Account.from_key(private_key)
+        self.nonce = None
+        self.lock = threading.Lock()
+
+    def next_nonce(self, fetch):
+        """Returns the next nonce, or None if it had to be fetched and the fetch failed."""
+        with self.lock:
+            if self.nonce is None:
+                self.nonce = fetch(self.account.address)
+                if self.nonce is None:
+                    return None
+            nonce = self.nonce
+            self.nonce += 1
+            return nonce
+
+    def resync(self) -> None:
+        # After a rejected send the next nonce is fetched from the node again
+        with self.lock:
+            self.nonce = None
+
+
+_WALLETS = [_Wallet(a["private_key"]) for a in config.DEFAULT_TEST_ACCOUNTS.values()]
+_wallet_cycle = itertools.cycle(_WALLETS)
+
+
+@events.test_start.add_listener
+def _load_token(environment, **kwargs):
+    with open(config.AEGIS_TOKEN_ABI_FILE) as f:
+        abi = json.load(f)
+    with open(config.AEGIS_TOKEN_ADDRESS_FILE) as f:
+        address = Web3.to_checksum_address(f.read().strip())
+    contract = Web3().eth.contract(address=address, abi=abi)
+    # Calldata never changes, so it is encoded once for all users
+    _token["address"] = address
+    _token["transfer_data"] = contract.encode_abi("transfer", args=[Web3.to_checksum_address(RECIPIENT), 1])
+    _token["balance_data"] = contract.encode_abi("balanceOf", args=[Web3.to_checksum_address(RECIPIENT)])
+    w3 = Web3(Web3.HTTPProvider(environment.host))
+    _fund_senders(w3.eth.contract(address=address, abi=abi), config.receipt_poll_latency(environment.host))
+
+
+def _fund_senders(contract, poll_latency):
+    """Tops up every sender from the token owner (account 0) and waits for it."""
+    w3 = contract.w3
+    owner = _WALLETS[0].account
+    nonce = w3.eth.get_transaction_count(owner.address, "pending")
+    gas_price = w3.eth.gas_price or Web3.to_wei(1, "gwei")
+    tx_hashes = []
+    for wallet in _WALLETS[1:]:
+        balance = contract.functions.balanceOf(wallet.account.address).call()
+        if balance >= SENDER_FUNDING:
+            continue
+        tx = contract.functions.transfer(wallet.account.address, SENDER_FUNDING - balance).build_transaction({
+            "from": owner.address,
+            "nonce": nonce,
+            "gas": ERC20_TRANSFER_GAS,
+            "gasPrice": gas_price,
+            "chainId": config.GANACHE_CHAIN_ID,
+        })
+        tx_hashes.append(w3.eth.send_raw_transaction(owner.sign_transaction(tx).raw_transaction))
+        nonce += 1
+    for tx_hash in tx_hashes:
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=poll_latency)
+        if receipt.status != 1:
+            raise RuntimeError(f"Funding transfer {Web3.to_hex(tx_hash)} reverted; is account 0 the token owner?")
+
+
+class TokenUser(HttpUser):
+    wait_time = between(0, 0.05)
+
+    def on_start(self):
+        self.wallet = next(_wallet_cycle)
+        self.request_id = itertools.count()
+
+    def _rpc(self, method, params, name):
+        payload = {"jsonrpc": "2.0", "id": next(self.request_id), "method": method, "params": params}
+        with self.client.post("/", json=payload, name=name, catch_response=True) as response:
+            body = response.json()
+            if "error" in body:
+                response.failure(body["error"].get("message", "JSON-RPC error"))
+                return None
+            if body.get("result") is None:
+                response.failure("JSON-RPC response without a result")
+                return None
+            return body["result"]
+
+    def _fetch_nonce(self, address):
+        # None (already reported as a failed request) if the node errored
+        result = self._rpc("eth_getTransactionCount", [address, "pending"], "eth_getTransactionCount")
+        return int(result, 16) if result is not None else None
+
+    @task(3)
+    def transfer(self):
+        if _gas_price["value"] is None:
+            result = self._rpc("eth_gasPrice", [], "eth_gasPrice")
+            if result is None:
+                return
+            _gas_price["value"] = int(result, 16) or Web3.to_wei(1, "gwei")
+        nonce = self.wallet.next_nonce(self._fetch_nonce)
+        if nonce is None:
+            return
+        tx = {
+            "to": _token["address"],
+            "data": _token["transfer_data"],
+            "value": 0,
+            "gas": ERC20_TRANSFER_GAS,
+            "gasPrice": _gas_price["value"],
+            "nonce": nonce,
+            "chainId": config.GANACHE_CHAIN_ID,
+        }
+        signed = self.wallet.account.sign_transaction(tx)
+        raw = Web3.to_hex(signed.raw_transaction)
+        if self._rpc("eth_sendRawTransaction", [raw], "eth_sendRawTransaction transfer") is None:
+            self.wallet.resync()
+
+    @task(1)
+    def balance_of(self):
+        self._rpc("eth_call", [{"to": _token["address"], "data": _token["balance_data"]}, "latest"], "eth_call balanceOf")
@@ -6,6 +6,7 @@ This module should be imported first by all other modules.
 """
 
 import os
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -73,6 +74,51 @@ P2P_MESSAGE_MAX_SIZE = int(os.environ.get("P2P_MESSAGE_MAX_SIZE", "4096"))
 DEFAULT_GAS_LIMIT = int(os.environ.get("DEFAULT_GAS_LIMIT", "500000"))
 DEFAULT_GAS_PRICE_GWEI = int(os.environ.get("DEFAULT_GAS_PRICE_GWEI", "1"))
 TRANSACTION_TIMEOUT = int(os.environ.get("TRANSACTION_TIMEOUT", "120"))
+# eth_gasPrice barely moves on a local chain; reuse it for GAS_PRICE_TTL seconds
+GAS_PRICE_TTL = float(os.environ.get("GAS_PRICE_TTL", "5"))
+
+# --- RPC Client Helpers ---
+# Pooled HTTP connections to the node, created on first use
+_HTTP_SESSION = None
+
+
+def receipt_poll_latency(rpc_url: str) -> float:
+    """
+    Returns the receipt polling interval, in seconds, for the node at rpc_url.
+
+    A local node mines instantly, so receipts are polled every 10 ms instead
+    of web3's default 100 ms; remote nodes keep the default.
+    """
+    return 0.01 if rpc_url.startswith(("http://127.", "http://localhost")) else 0.1
+
+
+def http_session() -> "requests.Session":
+    """Returns the keep-alive session shared by every module's HTTPProvider."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        # Imported here so plain settings lookups do not need requests installed
+        import requests
+        _HTTP_SESSION = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        _HTTP_SESSION.mount('http://', adapter)
+        _HTTP_SESSION.mount('https://', adapter)
+    return _HTTP_SESSION
+
+
+def cached_gas_price(w3, cache: dict) -> int:
+    """
+    Returns w3.eth.gas_price, re-fetching it at most once every GAS_PRICE_TTL seconds.
+
+    cache is the caller's {"ts": float, "value": int | None} dict, one per
+    Web3 instance. Ganache may report a zero gas price, in which case
+    DEFAULT_GAS_PRICE_GWEI is used.
+    """
+    now = time.monotonic()
+    if cache["value"] is None or now - cache["ts"] >= GAS_PRICE_TTL:
+        gas_price = w3.eth.gas_price
+        cache["value"] = gas_price if gas_price > 0 else DEFAULT_GAS_PRICE_GWEI * 10**9
+        cache["ts"] = now
+    return cache["value"]
 
 # --- Security Settings ---
 ALLOWED_FILE_UPLOAD_DIRS = [
@@ -15,6 +15,11 @@ from datetime import datetime
 from typing import Optional
 from pathlib import Path
 
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
 # --- Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -99,11 +104,14 @@ def _generate_proposal_id() -> str:
 
 def _load_contributions() -> list:
     """Loads contribution data from CONTRIBUTIONS_FILE."""
-    if not os.path.exists(CONTRIBUTIONS_FILE):
-        return []
     try:
+        if _json_fast:
+            with open(CONTRIBUTIONS_FILE, "rb") as f:
+                return _json_fast.loads(f.read())
         with open(CONTRIBUTIONS_FILE, "r") as f:
             return json.load(f)
+    except FileNotFoundError:
+        return []
     except json.JSONDecodeError:
         logger.warning(f"{CONTRIBUTIONS_FILE} contains invalid JSON. Starting with an empty list.")
         return []
@@ -112,14 +120,40 @@ def _load_contributions() -> list:
         return []
 
 
+def _dump_contributions(contributions_data: list) -> bytes:
+    """Serializes contribution data, preferring orjson over the stdlib encoder."""
+    if _json_fast:
+        try:
+            return _json_fast.dumps(contributions_data, option=_json_fast.OPT_INDENT_2)
+        except TypeError:
+            # orjson rejects integers wider than 64 bits; let the stdlib handle them
+            pass
+    return json.dumps(contributions_data, indent=4).encode()
+
+
 def _save_contributions(contributions_data: list) -> bool:
-    """Saves contribution data to CONTRIBUTIONS_FILE."""
+    """
+    Saves contribution data to CONTRIBUTIONS_FILE.
+
+    Writes to a temporary file and swaps it in with os.replace, so a crash
+    mid-write never leaves a truncated contributions.json behind.
+    """
+    tmp_path = CONTRIBUTIONS_FILE + ".tmp"
     try:
-        with open(CONTRIBUTIONS_FILE, "w") as f:
-            json.dump(contributions_data, f, indent=4)
+        # Encode first and write once; json.dump issues a write per token
+        payload = _dump_contributions(contributions_data)
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONTRIBUTIONS_FILE)
         return True
     except Exception as e:
         logger.error(f"Error saving contributions to {CONTRIBUTIONS_FILE}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
         return False
 
 
@@ -279,6 +313,15 @@ def review_contribution(
     return True
 
 
+def _snapshot_balances(project_id: str, dids: list) -> dict:
+    """
+    Returns {did: balance} for several DIDs from a single project lookup.
+    """
+    project_data = project_management.get_project(project_id) or {}
+    token_ledger = project_data.get("token_ledger", {})
+    return {did: token_ledger.get(did, 0) for did in dids}
+
+
 def get_contribution(proposal_id: str) -> Optional[dict]:
     """Retrieves a specific contribution proposal by its ID."""
     contributions = _load_contributions()
@@ -368,48 +411,53 @@ if __name__ == '__main__':
         exit(1)
 
     print("Setting up DIDs...")
+    # Every .accounts access is an eth_accounts RPC, so fetch the list once
+    accounts = did_system.w3.eth.accounts
 
     # Owner DID
     owner_did_string = f"did:aegis:cw-test-owner-{uuid.uuid4().hex[:6]}"
     owner_did_bytes = did_system.generate_did_identifier(owner_did_string)
-    owner_address = did_system.w3.eth.accounts[0]
+    owner_address = accounts[0]
     owner_pk = DEFAULT_OWNER_PK  # <-- CORRIGIDO
 
-    try:
-        owner_registered = did_system.register_did(
-            owner_did_bytes, "owner_pk", "owner_cid", owner_address, owner_pk
-        )
-    except Exception as e:
-        print(f"Erro ao registrar owner DID: {e}")
-        exit(1)
-
     # Contributor DID
     contrib_did_string = f"did:aegis:cw-test-contrib-{uuid.uuid4().hex[:6]}"
     contrib_did_bytes = did_system.generate_did_identifier(contrib_did_string)
-    contrib_address = did_system.w3.eth.accounts[1]
+    contrib_address = accounts[1]
     contrib_pk = DEFAULT_CONTRIBUTOR_PK  # <-- CORRIGIDO
 
-    try:
-        contrib_registered = did_system.register_did(
-            contrib_did_bytes, "contrib_pk", "contrib_cid", contrib_address, contrib_pk
-        )
-    except Exception as e:
-        print(f"Erro ao registrar contributor DID: {e}")
-        exit(1)
-
     # Reviewer DID (terceira conta)
     reviewer_did_string = f"did:aegis:cw-test-reviewer-{uuid.uuid4().hex[:6]}"
     reviewer_did_bytes = did_system.generate_did_identifier(reviewer_did_string)
-    reviewer_address = did_system.w3.eth.accounts[2]
+    reviewer_address = accounts[2]
     reviewer_pk = DEFAULT_REVIEWER_PK  # <-- CORRIGIDO
 
-    try:
-        reviewer_registered = did_system.register_did(
-            reviewer_did_bytes, "reviewer_pk", "reviewer_cid", reviewer_address, reviewer_pk
-        )
-    except Exception as e:
-        print(f"Erro ao registrar reviewer DID: {e}")
-        # Não é crítico para todos os testes
+    # Each DID is registered from its own account, so the three transactions
+    # are independent and their receipt waits can overlap
+    from concurrent.futures import ThreadPoolExecutor
+    registrations = {
+        "owner": (owner_did_bytes, "owner_pk", "owner_cid", owner_address, owner_pk),
+        "contributor": (contrib_did_bytes, "contrib_pk", "contrib_cid", contrib_address, contrib_pk),
+        "reviewer": (reviewer_did_bytes, "reviewer_pk", "reviewer_cid", reviewer_address, reviewer_pk),
+    }
+    with ThreadPoolExecutor(max_workers=len(registrations)) as pool:
+        futures = {
+            role: pool.submit(did_system.register_did, *args)
+            for role, args in registrations.items()
+        }
+
+    registered = {}
+    for role, future in futures.items():
+        try:
+            registered[role] = future.result()
+        except Exception as e:
+            print(f"Erro ao registrar {role} DID: {e}")
+            if role != "reviewer":  # Reviewer não é crítico para todos os testes
+                exit(1)
+            registered[role] = False
+    owner_registered = registered["owner"]
+    contrib_registered = registered["contributor"]
+    reviewer_registered = registered["reviewer"]
 
     if not (owner_registered and contrib_registered):
         print("Failed to register DIDs on-chain. Aborting tests.")
@@ -475,12 +523,21 @@ if __name__ == '__main__':
     print("\n--- Testing review_contribution (CORRIGIDO) ---")
     if test_proposal_id and owner_did and test_project_id and contributor_did:
         print(f"\nApproving contribution {test_proposal_id} with 100 token reward...")
+        balances_before = _snapshot_balances(test_project_id, [owner_did, contributor_did])
         review_success = review_contribution(
             test_proposal_id, owner_did, "approved", 100, 
             reviewer_private_key=owner_pk
         )
         if review_success:
             print(f"Review successful for proposal {test_proposal_id}.")
+            balances_after = _snapshot_balances(test_project_id, [owner_did, contributor_did])
+            print(f"Balances after reward: {balances_after}")
+            expected_balances = {
+                owner_did: balances_before[owner_did] - 100,
+                contributor_did: balances_before[contributor_did] + 100,
+            }
+            if balances_after != expected_balances:
+                print(f"ERROR: Reward balances are {balances_after}, expected {expected_balances}.")
         else:
             print(f"ERROR: Review failed for proposal {test_proposal_id}.")
 
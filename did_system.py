@@ -13,6 +13,8 @@ import logging
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware
 
+import config
+
 # --- Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +24,7 @@ logger = logging.getLogger(__name__)
 
 # --- Configuration via Environment Variables ---
 GANACHE_URL = os.environ.get("GANACHE_URL", "http://127.0.0.1:8545")
+RECEIPT_POLL_LATENCY = config.receipt_poll_latency(GANACHE_URL)
 ABI_FILE_PATH = "DIDRegistry.abi.json"
 CONTRACT_ADDRESS_FILE = "DIDRegistry.address.txt"
 
@@ -29,27 +32,30 @@ CONTRACT_ADDRESS_FILE = "DIDRegistry.address.txt"
 w3 = None
 did_registry_contract = None
 contract_address = None
+# Gas price for this module's w3, see config.cached_gas_price
+_GAS_PRICE_CACHE = {"ts": 0.0, "value": None}
 
 
 def _init_web3_and_contract():
     global w3, did_registry_contract, contract_address
 
-    if not os.path.exists(ABI_FILE_PATH):
-        raise FileNotFoundError(f"ABI file not found: {ABI_FILE_PATH}")
-    if not os.path.exists(CONTRACT_ADDRESS_FILE):
-        raise FileNotFoundError(f"Contract address file not found: {CONTRACT_ADDRESS_FILE}")
-
-    with open(ABI_FILE_PATH, 'r') as f:
-        abi = json.load(f)
-    with open(CONTRACT_ADDRESS_FILE, 'r') as f:
-        contract_address = f.read().strip()
+    try:
+        with open(ABI_FILE_PATH, 'r') as f:
+            abi = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"ABI file not found: {ABI_FILE_PATH}") from None
+    try:
+        with open(CONTRACT_ADDRESS_FILE, 'r') as f:
+            contract_address = f.read().strip()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Contract address file not found: {CONTRACT_ADDRESS_FILE}") from None
 
     if not contract_address:
         raise ValueError("Contract address is empty.")
     if not Web3.is_address(contract_address):
         logger.warning(f"Contract address {contract_address} is not a checksum address.")
 
-    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    w3 = Web3(Web3.HTTPProvider(GANACHE_URL, session=config.http_session(), request_kwargs={'timeout': 30}))
     w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
 
     if not w3.is_connected():
@@ -74,14 +80,34 @@ def _get_account_balance(address: str) -> int:
     return w3.eth.get_balance(address)
 
 
-def _validate_sufficient_balance(address: str, private_key: str, gas_estimate: int):
+def _gas_price() -> int:
+    """Returns the node's gas price, cached for config.GAS_PRICE_TTL seconds."""
+    return config.cached_gas_price(w3, _GAS_PRICE_CACHE)
+
+
+def _fetch_balance_and_nonce(address: str) -> tuple[int, int]:
+    """Fetches the ETH balance and next nonce of an address in one JSON-RPC batch."""
+    if w3 is None:
+        raise ConnectionError("Web3 not initialized")
+    if not hasattr(w3, "batch_requests"):
+        return w3.eth.get_balance(address), w3.eth.get_transaction_count(address)
+    with w3.batch_requests() as batch:
+        batch.add(w3.eth.get_balance(address))
+        batch.add(w3.eth.get_transaction_count(address))
+        balance, nonce = batch.execute()
+    return balance, nonce
+
+
+def _validate_sufficient_balance(address: str, private_key: str, gas_estimate: int,
+                                 balance: int = None):
     """
     CRÍTICO #3: Verifica se o endereço tem saldo suficiente para a transação.
     Raises ValueError se saldo insuficiente.
     """
-    balance = _get_account_balance(address)
+    if balance is None:
+        balance = _get_account_balance(address)
     # Custo total = gas * gas_price
-    gas_price = w3.eth.gas_price
+    gas_price = _gas_price()
     total_cost = gas_estimate * gas_price
     
     if balance < total_cost:
@@ -133,20 +159,21 @@ def register_did(did_bytes32: bytes, public_key: str, document_cid: str,
             gas_estimate = 300000  # Default fallback
 
         # CRÍTICO #3: Verificar saldo antes de enviar transação
-        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate)
+        balance, nonce = _fetch_balance_and_nonce(owner_eth_address)
+        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate, balance)
 
         txn = did_registry_contract.functions.registerDID(
             did_bytes32, public_key, document_cid
         ).build_transaction({
             'from': owner_eth_address,
-            'nonce': w3.eth.get_transaction_count(owner_eth_address),
+            'nonce': nonce,
             'gas': gas_estimate,
-            'gasPrice': w3.eth.gas_price
+            'gasPrice': _gas_price()
         })
 
         signed_txn = w3.eth.account.sign_transaction(txn, owner_eth_private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=RECEIPT_POLL_LATENCY)
         
         logger.info(f"DID registered successfully. Tx: {tx_hash.hex()}")
         return receipt.status == 1
@@ -159,6 +186,70 @@ def register_did(did_bytes32: bytes, public_key: str, document_cid: str,
         return False
 
 
+def register_dids(registrations: list, owner_eth_address: str, owner_eth_private_key: str) -> list:
+    """
+    Registers several DIDs owned by the same address without waiting between them.
+
+    registrations is a list of (did_bytes32, public_key, document_cid) tuples.
+    The balance and nonce are fetched once, every transaction is sent with a
+    locally incremented nonce, and the receipts are awaited at the end.
+    Returns one success flag per registration. Like register_did, an
+    insufficient balance raises ValueError and any other failure is logged
+    and reported as False.
+    """
+    results = [False] * len(registrations)
+    if not did_registry_contract:
+        logger.error("Contract not initialized")
+        return results
+
+    try:
+        calls = [
+            did_registry_contract.functions.registerDID(did_bytes32, public_key, document_cid)
+            for did_bytes32, public_key, document_cid in registrations
+        ]
+        gas_estimates = []
+        for call in calls:
+            try:
+                gas_estimates.append(call.estimate_gas({'from': owner_eth_address}))
+            except Exception:
+                gas_estimates.append(300000)  # Default fallback
+
+        # CRÍTICO #3: o saldo precisa cobrir todas as transações do lote
+        balance, nonce = _fetch_balance_and_nonce(owner_eth_address)
+        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, sum(gas_estimates), balance)
+        gas_price = _gas_price()
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Failed to prepare DID registrations: {e}")
+        return results
+
+    tx_hashes = []
+    for i, (call, gas_estimate) in enumerate(zip(calls, gas_estimates)):
+        try:
+            txn = call.build_transaction({
+                'from': owner_eth_address,
+                'nonce': nonce + i,
+                'gas': gas_estimate,
+                'gasPrice': gas_price
+            })
+            signed_txn = w3.eth.account.sign_transaction(txn, owner_eth_private_key)
+            tx_hashes.append(w3.eth.send_raw_transaction(signed_txn.raw_transaction))
+        except Exception as e:
+            # Later nonces would be stuck behind the gap, so stop sending
+            logger.error(f"Failed to send DID registration {i}: {e}")
+            break
+
+    for i, tx_hash in enumerate(tx_hashes):
+        try:
+            results[i] = w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=RECEIPT_POLL_LATENCY).status == 1
+        except Exception as e:
+            logger.error(f"Failed to register DID {i}: {e}")
+    logger.info(f"Registered {sum(results)} of {len(registrations)} DIDs.")
+    return results
+
+
 def update_public_key(did_bytes32: bytes, new_public_key: str,
                       owner_eth_address: str, owner_eth_private_key: str) -> bool:
     """Updates the public key for a DID."""
@@ -173,20 +264,21 @@ def update_public_key(did_bytes32: bytes, new_public_key: str,
         except:
             gas_estimate = 300000
 
-        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate)
+        balance, nonce = _fetch_balance_and_nonce(owner_eth_address)
+        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate, balance)
 
         txn = did_registry_contract.functions.updatePublicKey(
             did_bytes32, new_public_key
         ).build_transaction({
             'from': owner_eth_address,
-            'nonce': w3.eth.get_transaction_count(owner_eth_address),
+            'nonce': nonce,
             'gas': gas_estimate,
-            'gasPrice': w3.eth.gas_price
+            'gasPrice': _gas_price()
         })
 
         signed_txn = w3.eth.account.sign_transaction(txn, owner_eth_private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=RECEIPT_POLL_LATENCY)
         
         logger.info(f"Public key updated. Tx: {tx_hash.hex()}")
         return receipt.status == 1
@@ -210,20 +302,21 @@ def update_document_cid(did_bytes32: bytes, new_document_cid: str,
         except:
             gas_estimate = 300000
 
-        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate)
+        balance, nonce = _fetch_balance_and_nonce(owner_eth_address)
+        _validate_sufficient_balance(owner_eth_address, owner_eth_private_key, gas_estimate, balance)
 
         txn = did_registry_contract.functions.updateDocumentCID(
             did_bytes32, new_document_cid
         ).build_transaction({
             'from': owner_eth_address,
-            'nonce': w3.eth.get_transaction_count(owner_eth_address),
+            'nonce': nonce,
             'gas': gas_estimate,
-            'gasPrice': w3.eth.gas_price
+            'gasPrice': _gas_price()
         })
 
         signed_txn = w3.eth.account.sign_transaction(txn, owner_eth_private_key)
         tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, poll_latency=RECEIPT_POLL_LATENCY)
         
         logger.info(f"Document CID updated. Tx: {tx_hash.hex()}")
         return receipt.status == 1
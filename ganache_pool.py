@@ -0,0 +1,79 @@
+"""
+Warm Ganache slot shared by the contract interaction tests.
+
+Instead of starting a fresh Ganache per test run, one long-running node
+(see `make run-ganache-warm`) serves every run on the host. A test class
+claims it with acquire_slot(), which takes an exclusive flock on
+GANACHE_LOCK_FILE and snapshots the chain. release_slot() reverts to that
+snapshot and drops the lock, so the next run starts from the same state
+without paying Ganache's cold start.
+"""
+
+import os
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are not serialized
+    fcntl = None
+
+GANACHE_LOCK_FILE = os.environ.get("GANACHE_LOCK_FILE", "ganache.lock")
+
+# Lock file and snapshot id held by this process, if any
+_slot = {"lock_file": None, "snapshot_id": None}
+
+
+def lock_path_for(rpc_url: str) -> str:
+    """
+    Returns the lock file guarding the node at rpc_url.
+
+    The default port uses GANACHE_LOCK_FILE itself; other ports (one node per
+    pytest-xdist worker) get their own file, so workers never wait on each other.
+    """
+    port = urlparse(rpc_url).port or 8545
+    if port == 8545:
+        return GANACHE_LOCK_FILE
+    root, ext = os.path.splitext(GANACHE_LOCK_FILE)
+    return f"{root}-{port}{ext}"
+
+
+def acquire_slot(w3, blocking: bool = True, lock_path: str = None):
+    """
+    Claims the warm Ganache for this process and snapshots its state.
+
+    Blocks until no other run holds the slot unless blocking=False, in
+    which case BlockingIOError is raised if it is taken. lock_path defaults
+    to GANACHE_LOCK_FILE. Returns the snapshot id that release_slot() will
+    revert to.
+    """
+    if _slot["lock_file"] is not None:
+        raise RuntimeError("Ganache slot already acquired by this process")
+    lock_file = open(lock_path or GANACHE_LOCK_FILE, "a")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise
+    try:
+        snapshot_id = w3.provider.make_request("evm_snapshot", [])["result"]
+    except Exception:
+        lock_file.close()
+        raise
+    _slot["lock_file"] = lock_file
+    _slot["snapshot_id"] = snapshot_id
+    return snapshot_id
+
+
+def release_slot(w3) -> None:
+    """Reverts the chain to the snapshot taken by acquire_slot() and releases the lock."""
+    lock_file = _slot["lock_file"]
+    if lock_file is None:
+        return
+    try:
+        w3.provider.make_request("evm_revert", [_slot["snapshot_id"]])
+    finally:
+        _slot["lock_file"] = None
+        _slot["snapshot_id"] = None
+        # Closing the file drops the flock
+        lock_file.close()
@@ -30,10 +30,13 @@ except ipfshttpclient.exceptions.ConnectionError as e:
 
 PROJECT_BASE_DIR = "./project_data"
 
+_RE_NON_NAME_CHARS = re.compile(r'[^\w\s-]')
+_RE_SEPARATORS = re.compile(r'[-\s]+')
+
 def _sanitize_project_name(project_name: str) -> str:
     """Sanitizes a project name to be filesystem-friendly."""
-    name = re.sub(r'[^\w\s-]', '', project_name) # Remove non-alphanumeric, non-whitespace, non-hyphen
-    name = re.sub(r'[-\s]+', '-', name).strip('-_') # Replace whitespace/hyphens with single hyphen
+    name = _RE_NON_NAME_CHARS.sub('', project_name) # Remove non-alphanumeric, non-whitespace, non-hyphen
+    name = _RE_SEPARATORS.sub('-', name).strip('-_') # Replace whitespace/hyphens with single hyphen
     return name.lower()
 
 def initialize_project_repo(project_name: str) -> str | None:
@@ -1,10 +1,16 @@
 import json
-import os
+import logging
 from web3 import Web3
 from web3.middleware import ExtraDataToPOAMiddleware # For Ganache PoA compatibility
 
+import config
+
+# Handlers are configured by the application (or by __main__ below)
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 GANACHE_URL = "http://127.0.0.1:8545"
+RECEIPT_POLL_LATENCY = config.receipt_poll_latency(GANACHE_URL)
 ABI_FILE_PATH = "AegisToken.abi.json"
 CONTRACT_ADDRESS_FILE = "AegisToken.address.txt"
 
@@ -13,6 +19,18 @@ w3 = None
 aegis_token_contract = None
 contract_address = None
 
+# decimals() never changes for a deployed ERC20, so it is fetched once per contract address
+_DECIMALS_CACHE = {}
+# 10**decimals for the same contracts, so conversions skip the big-int pow
+_UNIT_CACHE = {}
+
+# Gas limit for an OpenZeppelin ERC20 transfer (~35-55k used) with headroom;
+# pass estimate_gas=True to the transfer functions to simulate instead
+ERC20_TRANSFER_GAS = 80_000
+
+# Gas price for this module's w3, see config.cached_gas_price
+_GAS_PRICE_CACHE = {"ts": 0.0, "value": None}
+
 # Default Ganache private keys (for testing only, replace if your Ganache uses different ones)
 # Account 0: 0x90F8bf6A479f320ead074411a4B0e7944Ea8c9C1
 DEFAULT_GANACHE_PK_0 = "0x4f3edf983ac636a65a842ce7c78d9aa706d3b113bce9c46f30d7d21715b23b1d"
@@ -23,53 +41,62 @@ DEFAULT_GANACHE_PK_1 = "0x6c002f5f36494661586ebb0882038bf8d598aafb88a5e230097170
 def _init_web3_and_contract():
     global w3, aegis_token_contract, contract_address
 
-    if not os.path.exists(ABI_FILE_PATH):
-        raise FileNotFoundError(f"ABI file not found: {ABI_FILE_PATH}. Please compile and deploy the AegisToken contract first.")
-    if not os.path.exists(CONTRACT_ADDRESS_FILE):
-        raise FileNotFoundError(f"Contract address file not found: {CONTRACT_ADDRESS_FILE}. Please deploy the AegisToken contract first.")
-
-    with open(ABI_FILE_PATH, 'r') as f:
-        abi = json.load(f)
-    with open(CONTRACT_ADDRESS_FILE, 'r') as f:
-        contract_address = f.read().strip()
+    # Open directly instead of checking os.path.exists first: one syscall
+    # fewer per file and no window for the file to vanish in between
+    try:
+        with open(ABI_FILE_PATH, 'r') as f:
+            abi = json.load(f)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"ABI file not found: {ABI_FILE_PATH}. Please compile and deploy the AegisToken contract first.") from None
+    try:
+        with open(CONTRACT_ADDRESS_FILE, 'r') as f:
+            contract_address = f.read().strip()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Contract address file not found: {CONTRACT_ADDRESS_FILE}. Please deploy the AegisToken contract first.") from None
 
     if not contract_address:
         raise ValueError("Contract address is empty. Please check AegisToken.address.txt.")
     if not Web3.is_address(contract_address):
-         print(f"Warning: Contract address {contract_address} is not a checksum address. Attempting to use as is.")
+         logger.warning("Contract address %s is not a checksum address. Attempting to use as is.", contract_address)
 
-    w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
+    w3 = Web3(Web3.HTTPProvider(GANACHE_URL, session=config.http_session(), request_kwargs={'timeout': 30}))
     w3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
 
     if not w3.is_connected():
         try:
             w3.eth.block_number
-            print(f"Successfully connected to Ganache at {GANACHE_URL} (via request).")
+            logger.info("Successfully connected to Ganache at %s (via request).", GANACHE_URL)
         except Exception as e:
-            print(f"Failed to connect to Ganache at {GANACHE_URL}. Error: {e}")
+            logger.error("Failed to connect to Ganache at %s. Error: %s", GANACHE_URL, e)
             raise ConnectionError(f"Failed to connect to Ganache: {e}")
     else:
-        print(f"Successfully connected to Ganache at {GANACHE_URL} (via is_connected()).")
+        logger.info("Successfully connected to Ganache at %s (via is_connected()).", GANACHE_URL)
 
     aegis_token_contract = w3.eth.contract(address=contract_address, abi=abi)
-    print(f"AegisToken contract instance created for address: {contract_address}")
+    logger.info("AegisToken contract instance created for address: %s", contract_address)
 
 # --- Initialize on import ---
 try:
     _init_web3_and_contract()
 except Exception as e:
-    print(f"Critical error during platform_token.py initialization: {e}")
-    print("Ensure Ganache is running and contract files (ABI, address) are present.")
+    logger.error(
+        "Critical error during platform_token.py initialization: %s. "
+        "Ensure Ganache is running and contract files (ABI, address) are present.", e
+    )
     w3 = None
     aegis_token_contract = None
 
+def _gas_price() -> int:
+    """Returns the node's gas price, cached for config.GAS_PRICE_TTL seconds."""
+    return config.cached_gas_price(w3, _GAS_PRICE_CACHE)
+
 # --- Token Information Functions ---
 def get_token_name() -> str | None:
     if not aegis_token_contract: return None
     try:
         return aegis_token_contract.functions.name().call()
     except Exception as e:
-        print(f"Error getting token name: {e}")
+        logger.error("Error getting token name: %s", e)
         return None
 
 def get_token_symbol() -> str | None:
@@ -77,23 +104,40 @@ def get_token_symbol() -> str | None:
     try:
         return aegis_token_contract.functions.symbol().call()
     except Exception as e:
-        print(f"Error getting token symbol: {e}")
+        logger.error("Error getting token symbol: %s", e)
         return None
 
 def get_token_decimals() -> int | None:
     if not aegis_token_contract: return None
+    decimals = _DECIMALS_CACHE.get(aegis_token_contract.address)
+    if decimals is not None:
+        return decimals
     try:
-        return aegis_token_contract.functions.decimals().call()
+        decimals = aegis_token_contract.functions.decimals().call()
     except Exception as e:
-        print(f"Error getting token decimals: {e}")
+        logger.error("Error getting token decimals: %s", e)
         return None
+    _DECIMALS_CACHE[aegis_token_contract.address] = decimals
+    return decimals
+
+def get_token_unit() -> int | None:
+    """Returns 10**decimals, the number of smallest units in one whole token."""
+    if not aegis_token_contract: return None
+    unit = _UNIT_CACHE.get(aegis_token_contract.address)
+    if unit is not None:
+        return unit
+    decimals = get_token_decimals()
+    if decimals is None:
+        return None
+    unit = _UNIT_CACHE[aegis_token_contract.address] = 10 ** decimals
+    return unit
 
 def get_total_supply() -> int | None:
     if not aegis_token_contract: return None
     try:
         return aegis_token_contract.functions.totalSupply().call()
     except Exception as e:
-        print(f"Error getting total supply: {e}")
+        logger.error("Error getting total supply: %s", e)
         return None
 
 def get_aegis_balance(account_address: str) -> int | None:
@@ -102,13 +146,21 @@ def get_aegis_balance(account_address: str) -> int | None:
         checksum_address = Web3.to_checksum_address(account_address)
         return aegis_token_contract.functions.balanceOf(checksum_address).call()
     except Exception as e:
-        print(f"Error getting balance for {account_address}: {e}")
+        logger.error("Error getting balance for %s: %s", account_address, e)
         return None
 
 # --- Token Transfer Function ---
-def transfer_aegis(sender_address: str, sender_private_key: str, recipient_address: str, amount_in_smallest_units: int) -> bool:
+def transfer_aegis(sender_address: str, sender_private_key: str, recipient_address: str, amount_in_smallest_units: int,
+                   estimate_gas: bool = False, wait: bool = True) -> bool | str:
+    """
+    Transfers $AEGIS and, by default, waits for the receipt and returns whether it succeeded.
+
+    With wait=False the hex transaction hash is returned as soon as the
+    transaction is submitted, so callers can send several transfers and
+    wait for their receipts afterwards. False is returned if submission fails.
+    """
     if not aegis_token_contract or not w3:
-        print("Error: Contract or Web3 not initialized for transfer.")
+        logger.error("Contract or Web3 not initialized for transfer.")
         return False
     try:
         checksum_sender_address = Web3.to_checksum_address(sender_address)
@@ -121,19 +173,18 @@ def transfer_aegis(sender_address: str, sender_private_key: str, recipient_addre
             'nonce': nonce,
         }
         
-        # Estimate gas
-        try:
-            gas_estimate = aegis_token_contract.functions.transfer(
-                checksum_recipient_address, amount_in_smallest_units
-            ).estimate_gas(tx_data)
-            tx_data['gas'] = gas_estimate
-        except Exception as e:
-            print(f"Gas estimation failed for transfer: {e}. Using default gas limit.")
-            tx_data['gas'] = 100000 # Default fallback gas for ERC20 transfer
+        # A fixed limit saves an eth_estimateGas round-trip; a transfer that
+        # would revert still fails and is reported through the receipt status
+        tx_data['gas'] = ERC20_TRANSFER_GAS
+        if estimate_gas:
+            try:
+                tx_data['gas'] = aegis_token_contract.functions.transfer(
+                    checksum_recipient_address, amount_in_smallest_units
+                ).estimate_gas(tx_data)
+            except Exception as e:
+                logger.warning("Gas estimation failed for transfer: %s. Using default gas limit.", e)
 
-        # Set gas price (handle Ganache's potentially zero gas price)
-        current_gas_price = w3.eth.gas_price
-        tx_data['gasPrice'] = current_gas_price if current_gas_price > 0 else w3.to_wei('1', 'gwei')
+        tx_data['gasPrice'] = _gas_price()
 
 
         transaction = aegis_token_contract.functions.transfer(
@@ -141,23 +192,81 @@ def transfer_aegis(sender_address: str, sender_private_key: str, recipient_addre
         ).build_transaction(tx_data)
 
         signed_tx = w3.eth.account.sign_transaction(transaction, private_key=sender_private_key)
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-        print(f"Transfer transaction sent. Hash: {w3.to_hex(tx_hash)}")
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        logger.debug("Transfer transaction sent. Hash: %s", w3.to_hex(tx_hash))
+        if not wait:
+            return w3.to_hex(tx_hash)
 
-        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120, poll_latency=RECEIPT_POLL_LATENCY)
 
         if tx_receipt.status == 1:
-            print(f"Successfully transferred {amount_in_smallest_units} $AEGIS from {checksum_sender_address} to {checksum_recipient_address}.")
+            logger.info(
+                "Successfully transferred %s $AEGIS from %s to %s (tx %s).",
+                amount_in_smallest_units, checksum_sender_address, checksum_recipient_address, w3.to_hex(tx_hash)
+            )
             return True
         else:
-            print(f"Token transfer failed. Transaction status: {tx_receipt.status}")
+            logger.error("Token transfer failed. Transaction status: %s", tx_receipt.status)
             return False
             
     except Exception as e:
-        print(f"An error occurred during token transfer: {e}")
+        logger.error("An error occurred during token transfer: %s", e)
         return False
 
+def transfer_aegis_batch(sender_address: str, sender_private_key: str, transfers: list[tuple[str, int]],
+                         estimate_gas: bool = False) -> list[bool]:
+    """
+    Sends several transfers from one sender without waiting between them.
+
+    The nonce and gas price are fetched once and the nonce is incremented
+    locally, so every transaction is submitted before the first receipt is
+    awaited. Returns one success flag per (recipient_address, amount) pair.
+    """
+    results = [False] * len(transfers)
+    if not aegis_token_contract or not w3:
+        logger.error("Contract or Web3 not initialized for transfer.")
+        return results
+    try:
+        checksum_sender_address = Web3.to_checksum_address(sender_address)
+        nonce = w3.eth.get_transaction_count(checksum_sender_address)
+        gas_price = _gas_price()
+    except Exception as e:
+        logger.error("An error occurred while preparing the batch transfer: %s", e)
+        return results
+
+    tx_hashes = []
+    for i, (recipient_address, amount_in_smallest_units) in enumerate(transfers):
+        try:
+            transfer_call = aegis_token_contract.functions.transfer(
+                Web3.to_checksum_address(recipient_address), amount_in_smallest_units
+            )
+            tx_data = {'from': checksum_sender_address, 'nonce': nonce + i, 'gasPrice': gas_price,
+                       'gas': ERC20_TRANSFER_GAS}
+            if estimate_gas:
+                try:
+                    tx_data['gas'] = transfer_call.estimate_gas(tx_data)
+                except Exception as e:
+                    logger.warning("Gas estimation failed for transfer %d: %s. Using default gas limit.", i, e)
+            signed_tx = w3.eth.account.sign_transaction(
+                transfer_call.build_transaction(tx_data), private_key=sender_private_key
+            )
+            tx_hashes.append(w3.eth.send_raw_transaction(signed_tx.raw_transaction))
+        except Exception as e:
+            # Later nonces would be stuck behind the gap, so stop submitting
+            logger.error("An error occurred sending transfer %d of the batch: %s", i, e)
+            break
+    logger.info("Batch transfer: sent %d of %d transactions.", len(tx_hashes), len(transfers))
+
+    for i, tx_hash in enumerate(tx_hashes):
+        try:
+            tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120, poll_latency=RECEIPT_POLL_LATENCY)
+            results[i] = tx_receipt.status == 1
+        except Exception as e:
+            logger.error("An error occurred waiting for transfer %d (%s): %s", i, w3.to_hex(tx_hash), e)
+    return results
+
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     print("\n--- Aegis Platform Token Interaction Tests ---")
     if not w3 or not aegis_token_contract:
         print("Web3/Contract not initialized. Aborting tests.")
@@ -175,7 +284,7 @@ if __name__ == '__main__':
         print(f"Decimals: {decimals}")
         if total_supply is not None and decimals is not None:
             print(f"Total Supply (smallest units): {total_supply}")
-            print(f"Total Supply (formatted): {total_supply / (10**decimals)}")
+            print(f"Total Supply (formatted): {total_supply / get_token_unit()}")
         else:
             print(f"Total Supply (smallest units): Error retrieving")
 
@@ -200,7 +309,7 @@ if __name__ == '__main__':
             # 3. Transfer some tokens
             if balance_deployer_before is not None and balance_deployer_before > 0 and decimals is not None:
                 amount_to_transfer_formatted = 100 # Transfer 100 $AEGIS tokens
-                amount_in_smallest = amount_to_transfer_formatted * (10**decimals)
+                amount_in_smallest = amount_to_transfer_formatted * get_token_unit()
                 
                 print(f"\nAttempting to transfer {amount_to_transfer_formatted} $AEGIS ({amount_in_smallest} smallest units) from Deployer to Recipient...")
                 transfer_success = transfer_aegis(deployer_address, deployer_pk, recipient_address, amount_in_smallest)
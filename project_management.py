@@ -6,19 +6,30 @@ Problemas críticos resolvidos:
 3. Configuração centralizada
 """
 
+import contextlib
+import functools
 import json
 import os
 import uuid
 import re
 import logging
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock is available
+    fcntl = None
+
 # --- Logging ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Handlers are configured by the application (or by __main__ below)
 logger = logging.getLogger(__name__)
 
 # --- Configuration via Environment Variables ---
@@ -43,54 +54,282 @@ try:
     import did_system
     import ipfs_storage
 except ImportError as e:
-    logger.error(f"Erro ao importar módulos: {e}")
+    logger.error("Erro ao importar módulos: %s", e)
     did_system = None
     ipfs_storage = None
 
 PROJECTS_FILE = "projects.json"
 PROJECT_DATA_BASE_DIR = "project_data"
+# fsync projects.json before swapping it in; set PROJECTS_FSYNC=0 to trade
+# durability on power loss for write throughput
+PROJECTS_FSYNC = os.environ.get("PROJECTS_FSYNC", "1") != "0"
+
+# --- In-memory projects cache ---
+# Mirrors PROJECTS_FILE so repeated lookups skip re-reading and re-parsing it.
+# "stamp" is the (mtime_ns, size) of the file the cache was built from and
+# "by_id" maps each project_id to its position in "data".
+_PROJECTS_CACHE = {"stamp": None, "data": [], "by_id": {}}
+# Guards _PROJECTS_CACHE and PROJECTS_FILE for multi-threaded callers. Every
+# read-modify-write holds it from the final reload until the save completes.
+_CACHE_LOCK = threading.RLock()
+
+# Fixed schema of a project record. Files are written with sorted keys, so the
+# JSON template lists the fields in sorted order.
+_PROJECT_KEYS = frozenset((
+    "project_id", "project_name", "owner_did", "repo_cid",
+    "token_name", "token_supply", "token_ledger",
+))
+_PROJECT_JSON_TEMPLATE = (
+    '{"owner_did": %s, "project_id": %s, "project_name": %s, "repo_cid": %s, '
+    '"token_ledger": %s, "token_name": %s, "token_supply": %d}'
+)
+_encode_json_string = json.encoder.encode_basestring_ascii
+
+# DID strings already confirmed as registered on-chain. DIDRegistry has no way
+# to unregister a DID, so positive answers never go stale; negative answers are
+# not cached because the DID may be registered later.
+_REGISTERED_DIDS = set()
+_REGISTERED_DIDS_MAX = 4096
+# Runs independent DID registry lookups concurrently; threads start on first use
+_DID_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="did-lookup")
+
+# Fields returned by list_projects() when the token ledger is not requested
+_PROJECT_SUMMARY_FIELDS = (
+    "project_id", "project_name", "owner_did", "repo_cid", "token_name", "token_supply",
+)
+
+
+_RE_NON_ID_CHARS = re.compile(r'[^\w\s-]')
+_RE_SEPARATORS = re.compile(r'[-\s]+')
+
+
+@functools.lru_cache(maxsize=1024)
+def _sanitize_cached(project_name: str) -> str:
+    """Deterministic part of the sanitization; returns '' if nothing is left."""
+    name = project_name.lower()
+    name = _RE_NON_ID_CHARS.sub('', name)  # Remove non-alphanumeric
+    return _RE_SEPARATORS.sub('-', name).strip('-_')
 
 
 def _sanitize_project_name_to_id(project_name: str) -> str:
     """
     Sanitizes a project name to create a filesystem-friendly and URL-friendly ID.
     """
-    if not project_name:
-        return f"project-{uuid.uuid4().hex[:8]}"
-
-    name = project_name.lower()
-    name = re.sub(r'[^\w\s-]', '', name)  # Remove non-alphanumeric
-    name = re.sub(r'[-\s]+', '-', name).strip('-_')
-
+    name = _sanitize_cached(project_name) if project_name else ""
     if not name:
+        # Random fallback IDs must never be served from the cache
         return f"project-{uuid.uuid4().hex[:8]}"
     return name
 
 
-def _load_projects() -> list:
-    """Loads project data from PROJECTS_FILE."""
-    if not os.path.exists(PROJECTS_FILE):
-        return []
+def _projects_file_stamp() -> Optional[tuple]:
+    """Returns (mtime_ns, size) of PROJECTS_FILE, or None if it does not exist."""
     try:
-        with open(PROJECTS_FILE, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        logger.warning(f"{PROJECTS_FILE} contains invalid JSON. Starting empty.")
-        return []
-    except Exception as e:
-        logger.error(f"Error loading projects from {PROJECTS_FILE}: {e}")
-        return []
+        st = os.stat(PROJECTS_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _set_projects_cache(projects_data: list, stamp: Optional[tuple]) -> None:
+    """Replaces the cached project list and rebuilds the project_id index."""
+    by_id = {}
+    for i, p in enumerate(projects_data):
+        by_id.setdefault(p.get("project_id"), i)
+    _PROJECTS_CACHE["data"] = projects_data
+    _PROJECTS_CACHE["by_id"] = by_id
+    _PROJECTS_CACHE["stamp"] = stamp
+
+
+def _load_projects() -> list:
+    """
+    Loads project data from PROJECTS_FILE.
+
+    The parsed list is cached and only re-read when the file changes on disk,
+    so the returned list is shared with the cache.
+    """
+    with _CACHE_LOCK:
+        stamp = _projects_file_stamp()
+        if stamp is None:
+            _set_projects_cache([], None)
+            return _PROJECTS_CACHE["data"]
+        if stamp == _PROJECTS_CACHE["stamp"]:
+            return _PROJECTS_CACHE["data"]
+        try:
+            if _json_fast:
+                with open(PROJECTS_FILE, "rb") as f:
+                    projects_data = _json_fast.loads(f.read())
+            else:
+                with open(PROJECTS_FILE, "r") as f:
+                    projects_data = json.load(f)
+        except json.JSONDecodeError:
+            logger.warning("%s contains invalid JSON. Starting empty.", PROJECTS_FILE)
+            projects_data, stamp = [], None
+        except Exception as e:
+            logger.error("Error loading projects from %s: %s", PROJECTS_FILE, e)
+            projects_data, stamp = [], None
+        _set_projects_cache(projects_data, stamp)
+        return projects_data
+
+
+def _find_project(project_id: str) -> Optional[dict]:
+    """Returns the cached project with the given project_id, or None."""
+    with _CACHE_LOCK:
+        projects = _load_projects()
+        index = _PROJECTS_CACHE["by_id"].get(project_id)
+        return projects[index] if index is not None else None
+
+
+def _encode_project(project: dict) -> str:
+    """
+    Encodes one project exactly like json.dumps(project, sort_keys=True) would.
+
+    Projects created by create_project always have the same fields, so only
+    the field values need encoding; anything else goes through the generic
+    encoder.
+    """
+    if project.keys() != _PROJECT_KEYS:
+        return json.dumps(project, sort_keys=True)
+    strings = (project["owner_did"], project["project_id"], project["project_name"],
+               project["repo_cid"], project["token_name"])
+    supply = project["token_supply"]
+    if type(supply) is not int or any(type(v) is not str for v in strings):
+        return json.dumps(project, sort_keys=True)
+    owner, pid, name, cid, token_name = map(_encode_json_string, strings)
+    ledger = json.dumps(project["token_ledger"], sort_keys=True)
+    return _PROJECT_JSON_TEMPLATE % (owner, pid, name, cid, ledger, token_name, supply)
+
+
+def _dump_projects(projects_data: list) -> bytes:
+    """
+    Serializes project data, preferring orjson over the stdlib encoder.
+
+    Keys are sorted, but the layout is not canonical: orjson writes indented
+    UTF-8, while the stdlib fallback (also used when a ledger holds an integer
+    wider than 64 bits) writes one compact, ASCII-escaped project per line.
+    The bytes therefore depend on the installed packages and on the data.
+    """
+    if _json_fast:
+        try:
+            return _json_fast.dumps(
+                projects_data, option=_json_fast.OPT_INDENT_2 | _json_fast.OPT_SORT_KEYS
+            )
+        except TypeError:
+            # orjson rejects integers wider than 64 bits; let the stdlib handle them
+            pass
+    if not projects_data:
+        return b"[]"
+    # One project per line keeps the file readable and diffable
+    return ("[\n" + ",\n".join(map(_encode_project, projects_data)) + "\n]").encode()
 
 
 def _save_projects(projects_data: list) -> bool:
-    """Saves project data to PROJECTS_FILE."""
-    try:
-        with open(PROJECTS_FILE, "w") as f:
-            json.dump(projects_data, f, indent=4)
+    """
+    Saves project data to PROJECTS_FILE and refreshes the cache.
+
+    The data is written to a temporary file next to PROJECTS_FILE and then
+    swapped in with os.replace, so a crash mid-write never leaves a truncated
+    projects.json behind.
+    """
+    tmp_path = PROJECTS_FILE + ".tmp"
+    with _CACHE_LOCK:
+        try:
+            payload = _dump_projects(projects_data)
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+                f.flush()
+                if PROJECTS_FSYNC:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, PROJECTS_FILE)
+        except Exception as e:
+            logger.error("Error saving projects to %s: %s", PROJECTS_FILE, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        _set_projects_cache(projects_data, _projects_file_stamp())
         return True
-    except Exception as e:
-        logger.error(f"Error saving projects to {PROJECTS_FILE}: {e}")
+
+
+@contextlib.contextmanager
+def _projects_write_lock():
+    """
+    Serializes a read-modify-write of PROJECTS_FILE across threads and processes.
+
+    Takes _CACHE_LOCK and then an exclusive flock on a sidecar lock file, so
+    two CLI processes cannot both load, modify and save the same snapshot.
+    Not re-entrant across processes: only the outermost caller should use it.
+    """
+    with _CACHE_LOCK:
+        if fcntl is None:
+            yield
+            return
+        with open(PROJECTS_FILE + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _persist_cache() -> bool:
+    """
+    Persists projects that were mutated in place inside the cache.
+
+    All projects share PROJECTS_FILE, so this rewrites it straight from the
+    cache without re-reading or re-parsing it first. Only module code may
+    mutate cached projects; callers get copies (see _copy_project).
+    """
+    with _CACHE_LOCK:
+        return _save_projects(_PROJECTS_CACHE["data"])
+
+
+def _is_did_registered(did: str) -> bool:
+    """Checks a DID string against the registry, caching positive answers."""
+    if did in _REGISTERED_DIDS:
+        return True
+    if not did_system.is_did_registered(did_system.generate_did_identifier(did)):
         return False
+    if len(_REGISTERED_DIDS) >= _REGISTERED_DIDS_MAX:
+        _REGISTERED_DIDS.clear()
+    _REGISTERED_DIDS.add(did)
+    return True
+
+
+def _are_dids_registered(*dids: str) -> list:
+    """
+    Runs _is_did_registered for several DIDs and returns the answers in order.
+
+    DIDs that are not cached yet are looked up concurrently, so the slowest
+    registry round-trip dominates instead of their sum.
+    """
+    if sum(did not in _REGISTERED_DIDS for did in dids) < 2:
+        return [_is_did_registered(did) for did in dids]
+    return list(_DID_POOL.map(_is_did_registered, dids))
+
+
+def _invalidate_did_cache(did: Optional[str] = None) -> None:
+    """Forgets one cached DID, or all of them (e.g. after redeploying DIDRegistry)."""
+    if did is None:
+        _REGISTERED_DIDS.clear()
+    else:
+        _REGISTERED_DIDS.discard(did)
+
+
+def _new_ledger(owner_did: str, token_supply: int, hint: int = 64) -> dict:
+    """
+    Creates a project's token ledger with room for about `hint` holders.
+
+    CPython dicts never shrink when keys are deleted, so inserting and then
+    removing placeholder keys pre-sizes the table and spares the first
+    transfers to new receivers a series of resizes.
+    """
+    token_ledger = dict.fromkeys(range(hint - 1))
+    for placeholder in range(hint - 1):
+        del token_ledger[placeholder]
+    token_ledger[owner_did] = token_supply
+    return token_ledger
 
 
 def create_project(project_name: str, owner_did: str, token_supply: int = 1000000) -> Optional[dict]:
@@ -102,29 +341,26 @@ def create_project(project_name: str, owner_did: str, token_supply: int = 100000
         return None
 
     # 1. Validate owner_did
-    owner_did_bytes32 = did_system.generate_did_identifier(owner_did)
-    if not did_system.is_did_registered(owner_did_bytes32):
-        logger.error(f"Owner DID '{owner_did}' is not registered on the blockchain.")
+    if not _is_did_registered(owner_did):
+        logger.error("Owner DID '%s' is not registered on the blockchain.", owner_did)
         return None
 
     # 2. Sanitize project_name to create project_id
     project_id = _sanitize_project_name_to_id(project_name)
     if not project_id:
-        logger.error(f"Could not generate a valid project_id for '{project_name}'.")
+        logger.error("Could not generate a valid project_id for '%s'.", project_name)
         return None
 
     # 3. Check if project_id already exists
-    projects = _load_projects()
-    for p in projects:
-        if p.get("project_id") == project_id:
-            logger.error(f"Project with ID '{project_id}' already exists.")
-            return None
+    if _find_project(project_id) is not None:
+        logger.error("Project with ID '%s' already exists.", project_id)
+        return None
 
     # 4. Initialize decentralized code repository
-    logger.info(f"Initializing IPFS repo for project ID: {project_id}")
+    logger.info("Initializing IPFS repo for project ID: %s", project_id)
     repo_cid = ipfs_storage.initialize_project_repo(project_id)
     if not repo_cid:
-        logger.error(f"Failed to initialize IPFS repository for project '{project_name}'.")
+        logger.error("Failed to initialize IPFS repository for project '%s'.", project_name)
         return None
 
     # Create project data directory
@@ -135,7 +371,7 @@ def create_project(project_name: str, owner_did: str, token_supply: int = 100000
     token_name = f"{project_id}_TOKEN"
 
     # 6. Initialize token ledger
-    token_ledger = {owner_did: token_supply}
+    token_ledger = _new_ledger(owner_did, token_supply)
 
     # 7. Prepare project metadata
     new_project_data = {
@@ -148,29 +384,67 @@ def create_project(project_name: str, owner_did: str, token_supply: int = 100000
         "token_ledger": token_ledger,
     }
 
-    # 8. Save the new project's metadata
-    projects.append(new_project_data)
-    if not _save_projects(projects):
-        logger.error(f"Failed to save project '{project_name}' to {PROJECTS_FILE}.")
-        return None
+    # 8. Save the new project's metadata, re-checking for a project created
+    #    by another caller while the IPFS repository was being initialized
+    with _projects_write_lock():
+        if _find_project(project_id) is not None:
+            logger.error("Project with ID '%s' already exists.", project_id)
+            return None
+        projects = _load_projects()
+        projects.append(new_project_data)
+        if not _save_projects(projects):
+            logger.error("Failed to save project '%s' to %s.", project_name, PROJECTS_FILE)
+            projects.pop()
+            return None
 
-    logger.info(f"Project '{project_name}' (ID: '{project_id}') created successfully.")
-    return new_project_data
+    logger.info("Project '%s' (ID: '%s') created successfully.", project_name, project_id)
+    return _copy_project(new_project_data)
+
+
+def _copy_project(project: dict) -> dict:
+    """
+    Returns a copy of a cached project that callers can modify freely.
+
+    The token ledger is the only nested value, so it is copied too.
+    """
+    copy = dict(project)
+    if isinstance(copy.get("token_ledger"), dict):
+        copy["token_ledger"] = dict(copy["token_ledger"])
+    return copy
 
 
 def get_project(project_id: str) -> Optional[dict]:
-    """Retrieves project details from projects.json using project_id."""
-    projects = _load_projects()
-    for p in projects:
-        if p.get("project_id") == project_id:
-            return p
-    logger.warning(f"Project with ID '{project_id}' not found.")
+    """
+    Retrieves project details from projects.json using project_id.
+
+    Returns a copy: changing it does not affect the stored project.
+    """
+    project = _find_project(project_id)
+    if project is not None:
+        return _copy_project(project)
+    logger.warning("Project with ID '%s' not found.", project_id)
     return None
 
 
-def list_projects() -> list:
-    """Returns a list of all project dictionaries from projects.json."""
-    return _load_projects()
+def iter_projects(include_ledger: bool = False):
+    """
+    Yields the projects from projects.json one at a time.
+
+    By default each entry is a lightweight summary without the token ledger,
+    which is the only field that grows with the number of holders. Pass
+    include_ledger=True to get copies of the full project dictionaries.
+    """
+    projects = _load_projects()
+    if include_ledger:
+        yield from map(_copy_project, projects)
+    else:
+        for p in projects:
+            yield {k: p.get(k) for k in _PROJECT_SUMMARY_FIELDS}
+
+
+def list_projects(include_ledger: bool = False) -> list:
+    """Returns iter_projects() as a list; prefer iter_projects() for a single pass."""
+    return list(iter_projects(include_ledger))
 
 
 def transfer_project_tokens(
@@ -190,79 +464,80 @@ def transfer_project_tokens(
         amount: The amount of tokens to transfer.
         sender_private_key: Optional private key for blockchain verification.
     """
+    # 1. Cheap local checks first, before any blockchain lookup
     if amount <= 0:
         logger.error("Transfer amount must be positive.")
         return False
 
-    if not did_system:
-        logger.error("did_system module not available")
-        return False
-
-    # 1. Validate DIDs
-    sender_did_bytes32 = did_system.generate_did_identifier(sender_did)
-    if not did_system.is_did_registered(sender_did_bytes32):
-        logger.error(f"Sender DID '{sender_did}' is not registered.")
-        return False
-
-    receiver_did_bytes32 = did_system.generate_did_identifier(receiver_did)
-    if not did_system.is_did_registered(receiver_did_bytes32):
-        logger.error(f"Receiver DID '{receiver_did}' is not registered.")
-        return False
-
     if sender_did == receiver_did:
         logger.error("Sender and receiver DIDs cannot be the same.")
         return False
 
-    # 2. Load all projects and find the target project
-    projects = _load_projects()
-    project_found = False
-    target_project_index = -1
-
-    for i, p in enumerate(projects):
-        if p.get("project_id") == project_id:
-            target_project_index = i
-            project_found = True
-            break
-
-    if not project_found:
-        logger.error(f"Project with ID '{project_id}' not found.")
+    if not did_system:
+        logger.error("did_system module not available")
         return False
 
-    project = projects[target_project_index]
-    token_ledger = project.get("token_ledger", {})
-
-    # 3. Check sender's balance
-    sender_balance = token_ledger.get(sender_did, 0)
-    if sender_balance < amount:
-        logger.error(
-            f"Sender '{sender_did}' has insufficient balance ({sender_balance}) "
-            f"to transfer {amount} tokens."
-        )
+    # 2. Make sure the project exists
+    if _find_project(project_id) is None:
+        logger.error("Project with ID '%s' not found.", project_id)
         return False
 
-    # 4. Update token ledger
-    token_ledger[sender_did] = sender_balance - amount
-    receiver_balance = token_ledger.get(receiver_did, 0)
-    token_ledger[receiver_did] = receiver_balance + amount
-
-    project["token_ledger"] = token_ledger
+    # 3. Validate DIDs on-chain
+    sender_registered, receiver_registered = _are_dids_registered(sender_did, receiver_did)
+    if not sender_registered:
+        logger.error("Sender DID '%s' is not registered.", sender_did)
+        return False
 
-    # 5. Save updated projects data
-    if _save_projects(projects):
-        logger.info(
-            f"Successfully transferred {amount} tokens from {sender_did} "
-            f"to {receiver_did} for project {project_id}."
-        )
-        return True
-    else:
-        logger.error(f"Failed to save token transfer for project {project_id}.")
-        # Revert in memory
-        token_ledger[sender_did] = sender_balance
-        token_ledger[receiver_did] = receiver_balance
+    if not receiver_registered:
+        logger.error("Receiver DID '%s' is not registered.", receiver_did)
         return False
 
+    with _projects_write_lock():
+        # Re-fetch under the lock: this reloads the file if another writer
+        # changed it, and the cached project is then updated in place
+        project = _find_project(project_id)
+        if project is None:
+            logger.error("Project with ID '%s' not found.", project_id)
+            return False
+        token_ledger = project.setdefault("token_ledger", {})
+
+        # 4. Check sender's balance
+        sender_balance = token_ledger.get(sender_did, 0)
+        if sender_balance < amount:
+            logger.error(
+                "Sender '%s' has insufficient balance (%s) to transfer %s tokens.",
+                sender_did, sender_balance, amount
+            )
+            return False
+
+        # 5. Update token ledger (one lookup per DID; None means no entry yet)
+        receiver_balance = token_ledger.get(receiver_did)
+        token_ledger[sender_did] = sender_balance - amount
+        token_ledger[receiver_did] = (receiver_balance or 0) + amount
+
+        # 6. Save updated projects data
+        if _persist_cache():
+            logger.info(
+                "Successfully transferred %s tokens from %s to %s for project %s.",
+                amount, sender_did, receiver_did, project_id
+            )
+            return True
+        else:
+            logger.error("Failed to save token transfer for project %s.", project_id)
+            # Revert in memory
+            token_ledger[sender_did] = sender_balance
+            if receiver_balance is None:
+                del token_ledger[receiver_did]
+            else:
+                token_ledger[receiver_did] = receiver_balance
+            return False
 
 if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
     # Test sanitize function
     print("Testing _sanitize_project_name_to_id:")
     names_to_test = [
@@ -12,27 +12,17 @@ def test_connection():
     w3 = Web3(Web3.HTTPProvider(GANACHE_URL))
 
     try:
-        # For web3.py v6+, is_connected() is deprecated, use is_listening()
-        # However, to maintain broader compatibility for now, let's try is_connected()
-        # and mention is_listening() in comments or documentation.
-        # As of Jan 2024, is_connected() still works but might show a warning.
-        if hasattr(w3, 'is_connected') and callable(w3.is_connected):
-            is_conn = w3.is_connected()
-        elif hasattr(w3.provider, 'is_connected') and callable(w3.provider.is_connected): # For some provider setups
-             is_conn = w3.provider.is_connected()
-        else:
-            # Fallback or error if no known connection check method is found
-            # For modern web3.py, direct check or a simple request is better.
-            # Let's try fetching accounts as a connection test.
-            w3.eth.accounts 
-            is_conn = True # If the above line doesn't raise an exception, we assume connection.
-            print("Connection check method 'is_connected' not found, attempting direct operation.")
-
+        # Fetching the accounts doubles as the connectivity check: one RPC
+        try:
+            accounts = w3.eth.accounts
+            is_conn = True
+        except Exception:
+            accounts = []
+            is_conn = False
 
         if is_conn:
             print("Successfully connected to Ganache!")
             
-            accounts = w3.eth.accounts
             if accounts:
                 print("Available accounts:")
                 for i, account in enumerate(accounts):
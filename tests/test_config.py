@@ -41,3 +41,29 @@ class TestConfiguration:
         assert len(config.DEFAULT_TEST_ACCOUNTS) >= 3
         assert "address" in config.DEFAULT_TEST_ACCOUNTS[0]
         assert "private_key" in config.DEFAULT_TEST_ACCOUNTS[0]
+
+    def test_receipt_poll_latency(self):
+        """Test that local nodes are polled faster than remote ones."""
+        assert config.receipt_poll_latency("http://127.0.0.1:8545") == 0.01
+        assert config.receipt_poll_latency("http://localhost:8546") == 0.01
+        assert config.receipt_poll_latency("https://rpc.example.org") == 0.1
+
+    def test_cached_gas_price(self, monkeypatch):
+        """Test that the gas price is cached per caller and a zero price falls back."""
+        from types import SimpleNamespace
+
+        calls = []
+
+        class FakeEth:
+            @property
+            def gas_price(self):
+                calls.append(1)
+                return 0  # Ganache can report a zero gas price
+
+        fake_w3 = SimpleNamespace(eth=FakeEth())
+        monkeypatch.setattr(config, "GAS_PRICE_TTL", 60.0)
+
+        cache = {"ts": 0.0, "value": None}
+        assert config.cached_gas_price(fake_w3, cache) == config.DEFAULT_GAS_PRICE_GWEI * 10**9
+        assert config.cached_gas_price(fake_w3, cache) == config.DEFAULT_GAS_PRICE_GWEI * 10**9
+        assert len(calls) == 1
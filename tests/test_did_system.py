@@ -6,6 +6,10 @@ import sys
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Ganache account 0 (see config.DEFAULT_TEST_ACCOUNTS)
+OWNER_ADDRESS = "0x90F8bf6A479f320ead074411a4B0e7944Ea8c9C1"
+OWNER_PK = "0x4f3edf983ac636a65a842ce7c78d9aa706d3b113bce9c46f30d7d21715b23b1d"
+
 
 class TestDIDSystem:
     """Test DID system functionality."""
@@ -44,3 +48,100 @@ class TestDIDSystem:
         # Should return False for non-existent DID
         result = self.did_system.is_did_registered(random_did)
         assert result is False
+
+    def test_gas_price_is_cached(self, monkeypatch):
+        """Test that the gas price is fetched once per TTL window."""
+        from types import SimpleNamespace
+
+        class FakeEth:
+            calls = 0
+
+            @property
+            def gas_price(self):
+                FakeEth.calls += 1
+                return 20
+
+        monkeypatch.setattr(self.did_system, "w3", SimpleNamespace(eth=FakeEth()))
+        monkeypatch.setattr(self.did_system, "_GAS_PRICE_CACHE", {"ts": 0.0, "value": None})
+        monkeypatch.setattr(self.did_system.config, "GAS_PRICE_TTL", 60.0)
+        assert self.did_system._gas_price() == 20
+        assert self.did_system._gas_price() == 20
+        assert FakeEth.calls == 1
+
+        monkeypatch.setattr(self.did_system.config, "GAS_PRICE_TTL", 0.0)
+        self.did_system._gas_price()
+        assert FakeEth.calls == 2
+
+    def _fake_chain(self, monkeypatch, balance=10**18, fail_balance=False):
+        """Points did_system at a fake node that signs with the real eth_account."""
+        from types import SimpleNamespace
+        from eth_account import Account
+        from web3 import Web3
+
+        sent = []
+
+        class FakeEth:
+            account = Account
+            gas_price = 20
+
+            def get_balance(self, address):
+                if fail_balance:
+                    raise ConnectionError("node unreachable")
+                return balance
+
+            def get_transaction_count(self, address):
+                return 3
+
+            def send_raw_transaction(self, raw_transaction):
+                sent.append(bytes(raw_transaction))
+                return len(sent).to_bytes(32, "big")
+
+            def wait_for_transaction_receipt(self, tx_hash, poll_latency=0.1):
+                return SimpleNamespace(status=1)
+
+        class FakeRegisterCall:
+            def __init__(self, did_bytes32, public_key, document_cid):
+                pass
+
+            def estimate_gas(self, tx):
+                return 100_000
+
+            def build_transaction(self, tx):
+                return {"to": "0x5b1869D9A4C187F2EAa108f3062412ecf0526b24", "value": 0,
+                        "data": "0x", "chainId": 1337, **tx}
+
+        monkeypatch.setattr(self.did_system, "w3", SimpleNamespace(eth=FakeEth(), from_wei=Web3.from_wei))
+        monkeypatch.setattr(
+            self.did_system, "did_registry_contract",
+            SimpleNamespace(functions=SimpleNamespace(registerDID=FakeRegisterCall)),
+        )
+        monkeypatch.setattr(self.did_system, "_GAS_PRICE_CACHE", {"ts": 0.0, "value": None})
+        return Account, sent
+
+    def test_register_dids_sends_consecutive_nonces(self, monkeypatch):
+        """Test that a batch registration signs every DID with a locally incremented nonce."""
+        import rlp
+        account, sent = self._fake_chain(monkeypatch)
+        registrations = [(bytes(32), "pk1", "cid1"), (b"\x01" * 32, "pk2", "cid2")]
+
+        assert self.did_system.register_dids(registrations, OWNER_ADDRESS, OWNER_PK) == [True, True]
+        assert [account.recover_transaction(raw) for raw in sent] == [OWNER_ADDRESS] * 2
+        # Legacy transactions are RLP lists that start with the nonce
+        assert [rlp.decode(raw)[0] for raw in sent] == [b"\x03", b"\x04"]
+
+    def test_register_dids_returns_false_when_node_fails(self, monkeypatch):
+        """Test that a failed balance/nonce lookup is reported like register_did does."""
+        _, sent = self._fake_chain(monkeypatch, fail_balance=True)
+        registrations = [(bytes(32), "pk1", "cid1"), (b"\x01" * 32, "pk2", "cid2")]
+
+        assert self.did_system.register_dids(registrations, OWNER_ADDRESS, OWNER_PK) == [False, False]
+        assert self.did_system.register_did(bytes(32), "pk1", "cid1", OWNER_ADDRESS, OWNER_PK) is False
+        assert sent == []
+
+    def test_register_dids_raises_on_insufficient_balance(self, monkeypatch):
+        """Test that an unaffordable batch raises ValueError before sending anything."""
+        _, sent = self._fake_chain(monkeypatch, balance=0)
+
+        with pytest.raises(ValueError):
+            self.did_system.register_dids([(bytes(32), "pk1", "cid1")], OWNER_ADDRESS, OWNER_PK)
+        assert sent == []
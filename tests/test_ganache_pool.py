@@ -0,0 +1,65 @@
+"""Tests for the warm Ganache slot helper."""
+import pytest
+from types import SimpleNamespace
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestGanacheSlot:
+    """Test slot locking and snapshot handling."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """Setup test fixtures."""
+        try:
+            import ganache_pool
+            self.pool = ganache_pool
+        except ImportError:
+            pytest.skip("ganache_pool module not available")
+
+        self.lock_path = tmp_path / "ganache.lock"
+        monkeypatch.setattr(self.pool, "GANACHE_LOCK_FILE", str(self.lock_path))
+        self.requests = []
+
+        def make_request(method, params):
+            self.requests.append((method, params))
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1" if method == "evm_snapshot" else True}
+
+        self.w3 = SimpleNamespace(provider=SimpleNamespace(make_request=make_request))
+        yield
+        self.pool.release_slot(self.w3)
+
+    def test_acquire_and_release_reverts_snapshot(self):
+        """Test that releasing the slot reverts to the snapshot taken on acquire."""
+        assert self.pool.acquire_slot(self.w3) == "0x1"
+        self.pool.release_slot(self.w3)
+        assert self.requests == [("evm_snapshot", []), ("evm_revert", ["0x1"])]
+
+        # Releasing twice is harmless
+        self.pool.release_slot(self.w3)
+        assert len(self.requests) == 2
+
+    def test_slot_is_exclusive(self):
+        """Test that a second claimant cannot take a held slot."""
+        if self.pool.fcntl is None:
+            pytest.skip("fcntl not available")
+        fcntl = self.pool.fcntl
+        self.pool.acquire_slot(self.w3)
+
+        with pytest.raises(RuntimeError):
+            self.pool.acquire_slot(self.w3)
+        with open(self.lock_path, "a") as other:
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self.pool.release_slot(self.w3)
+        with open(self.lock_path, "a") as other:
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_lock_path_per_port(self):
+        """Test that each node port gets its own lock file."""
+        default = str(self.lock_path)
+        assert self.pool.lock_path_for("http://127.0.0.1:8545") == default
+        assert self.pool.lock_path_for("http://127.0.0.1:8547") == default[:-len(".lock")] + "-8547.lock"
@@ -0,0 +1,349 @@
+"""Tests for the project management module."""
+import pytest
+import json
+from types import SimpleNamespace
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+class TestProjectStore:
+    """Test the projects.json store and its in-memory cache."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, monkeypatch):
+        """Setup test fixtures."""
+        try:
+            import project_management
+            self.pm = project_management
+        except ImportError:
+            pytest.skip("project_management module not available")
+
+        self.projects_file = tmp_path / "projects.json"
+        monkeypatch.setattr(self.pm, "PROJECTS_FILE", str(self.projects_file))
+        self.pm._set_projects_cache([], None)
+        self.pm._invalidate_did_cache()
+
+        # Every DID counts as registered; no blockchain is needed
+        self.fake_did_system = SimpleNamespace(
+            generate_did_identifier=lambda did: did.encode(),
+            is_did_registered=lambda did_bytes: True,
+        )
+        monkeypatch.setattr(self.pm, "did_system", self.fake_did_system)
+
+    def _write_projects(self, projects):
+        self.projects_file.write_text(json.dumps(projects))
+
+    def _project(self, project_id, ledger):
+        return {
+            "project_id": project_id,
+            "project_name": project_id.title(),
+            "owner_did": "did:owner",
+            "repo_cid": "QmRepo",
+            "token_name": f"{project_id}_TOKEN",
+            "token_supply": 1000,
+            "token_ledger": ledger,
+        }
+
+    def test_load_missing_file(self):
+        """Test that a missing file loads as an empty list."""
+        assert self.pm._load_projects() == []
+
+    def test_load_is_cached_until_file_changes(self, monkeypatch):
+        """Test that an unchanged file is not parsed twice."""
+        self._write_projects([self._project("alpha", {"did:owner": 1000})])
+        first = self.pm._load_projects()
+
+        def fail_open(*args, **kwargs):
+            raise AssertionError("projects.json was read again")
+
+        monkeypatch.setattr(self.pm, "open", fail_open, raising=False)
+        assert self.pm._load_projects() is first
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_save_and_reload_round_trip(self, monkeypatch, use_orjson):
+        """Test that saved projects reload identically with either JSON backend."""
+        if not use_orjson:
+            monkeypatch.setattr(self.pm, "_json_fast", None)
+        elif self.pm._json_fast is None:
+            pytest.skip("orjson not installed")
+        projects = [
+            self._project("alpha", {"did:owner": 1000}),
+            self._project("beta", {"did:owner": 2 ** 80}),
+        ]
+        assert self.pm._save_projects(projects)
+
+        self.pm._set_projects_cache([], None)
+        assert self.pm._load_projects() == projects
+
+    def test_failed_save_keeps_previous_file(self, monkeypatch):
+        """Test that a failed write leaves the old projects.json intact."""
+        original = [self._project("alpha", {"did:owner": 1000})]
+        assert self.pm._save_projects(original)
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(self.pm.os, "replace", fail_replace)
+        assert not self.pm._save_projects(original + [self._project("beta", {})])
+
+        assert json.loads(self.projects_file.read_text()) == original
+        assert not Path(str(self.projects_file) + ".tmp").exists()
+
+    def test_list_projects_omits_ledger_by_default(self):
+        """Test that list_projects returns summaries unless asked for ledgers."""
+        self._write_projects([self._project("alpha", {"did:owner": 1000})])
+
+        summary = self.pm.list_projects()
+        assert summary == [{
+            k: v for k, v in self._project("alpha", {}).items() if k != "token_ledger"
+        }]
+        full = self.pm.list_projects(include_ledger=True)
+        assert full[0]["token_ledger"] == {"did:owner": 1000}
+
+    def test_iter_projects_and_get_project(self):
+        """Test lazy iteration and lookup by project_id."""
+        self._write_projects([
+            self._project("alpha", {"did:owner": 1}),
+            self._project("beta", {"did:owner": 2}),
+        ])
+
+        projects = self.pm.iter_projects(include_ledger=True)
+        assert next(projects)["project_id"] == "alpha"
+        assert [p["project_id"] for p in projects] == ["beta"]
+        assert self.pm.get_project("beta")["token_ledger"] == {"did:owner": 2}
+        assert self.pm.get_project("gamma") is None
+
+    def test_returned_projects_are_copies(self, tmp_path, monkeypatch):
+        """Test that mutating a returned project never reaches the cache or the file."""
+        self._write_projects([self._project("alpha", {"did:owner": 1})])
+        monkeypatch.setattr(self.pm, "PROJECT_DATA_BASE_DIR", str(tmp_path / "project_data"))
+        monkeypatch.setattr(
+            self.pm, "ipfs_storage",
+            SimpleNamespace(initialize_project_repo=lambda project_id: "QmRepo"),
+        )
+
+        created = self.pm.create_project("Beta", "did:owner", token_supply=10)
+        created["token_ledger"]["did:owner"] = 999999
+        assert self.pm.get_project("beta")["token_ledger"] == {"did:owner": 10}
+
+        project = self.pm.get_project("alpha")
+        project["token_ledger"]["did:owner"] = 999
+        project["token_name"] = "changed"
+        self.pm.list_projects(include_ledger=True)[0]["token_ledger"]["did:other"] = 5
+
+        assert self.pm.get_project("alpha")["token_ledger"] == {"did:owner": 1}
+        assert self.pm.get_project("alpha")["token_name"] != "changed"
+
+    def test_create_project_rejects_duplicates(self, tmp_path, monkeypatch):
+        """Test that a duplicate project_id is caught before touching IPFS."""
+        repo_calls = []
+
+        def fake_initialize_project_repo(project_id):
+            repo_calls.append(project_id)
+            return "QmRepo"
+
+        monkeypatch.setattr(self.pm, "PROJECT_DATA_BASE_DIR", str(tmp_path / "project_data"))
+        monkeypatch.setattr(
+            self.pm, "ipfs_storage",
+            SimpleNamespace(initialize_project_repo=fake_initialize_project_repo),
+        )
+
+        created = self.pm.create_project("My Project", "did:owner", token_supply=50)
+        assert created["token_ledger"] == {"did:owner": 50}
+        assert self.pm.create_project("my project!", "did:owner") is None
+        assert repo_calls == ["my-project"]
+        assert [p["project_id"] for p in self.pm.list_projects()] == ["my-project"]
+
+    def test_transfer_updates_ledger_in_place(self):
+        """Test that a transfer mutates the cached project and persists it."""
+        self._write_projects([
+            self._project("alpha", {"did:owner": 1000}),
+            self._project("beta", {"did:owner": 5}),
+        ])
+        cached = self.pm._load_projects()
+
+        assert self.pm.transfer_project_tokens("beta", "did:owner", "did:dev", 3)
+
+        assert self.pm._load_projects() is cached
+        assert cached[1]["token_ledger"] == {"did:owner": 2, "did:dev": 3}
+        on_disk = json.loads(self.projects_file.read_text())
+        assert on_disk[1]["token_ledger"] == {"did:owner": 2, "did:dev": 3}
+        assert on_disk[0]["token_ledger"] == {"did:owner": 1000}
+
+    def test_transfer_insufficient_balance(self):
+        """Test that overdrawing a balance leaves the ledger untouched."""
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 11)
+        assert self.pm.get_project("alpha")["token_ledger"] == {"did:owner": 10}
+
+    def test_failed_transfer_is_reverted(self, monkeypatch):
+        """Test that a transfer that cannot be saved leaves no trace in the cache."""
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+        monkeypatch.setattr(self.pm, "_save_projects", lambda projects: False)
+
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 4)
+        assert self.pm.get_project("alpha")["token_ledger"] == {"did:owner": 10}
+
+    def test_rejects_skip_did_lookups(self, monkeypatch):
+        """Test that locally rejected transfers never query the DID registry."""
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+
+        def fail_lookup(did_bytes):
+            raise AssertionError("DID registry was queried")
+
+        monkeypatch.setattr(self.fake_did_system, "is_did_registered", fail_lookup)
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:owner", 1)
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 0)
+        assert not self.pm.transfer_project_tokens("gamma", "did:owner", "did:dev", 1)
+
+    def test_concurrent_transfers_are_not_lost(self, monkeypatch):
+        """Test that transfers from several threads all reach the file."""
+        import threading
+        monkeypatch.setattr(self.pm, "PROJECTS_FSYNC", False)
+        self._write_projects([self._project("alpha", {"did:owner": 1000})])
+
+        def worker(n):
+            for _ in range(20):
+                assert self.pm.transfer_project_tokens("alpha", "did:owner", f"did:dev{n}", 1)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        ledger = json.loads(self.projects_file.read_text())[0]["token_ledger"]
+        assert ledger["did:owner"] == 1000 - 8 * 20
+        assert all(ledger[f"did:dev{n}"] == 20 for n in range(8))
+
+    def test_write_lock_excludes_other_processes(self):
+        """Test that the projects write lock holds an exclusive flock."""
+        if self.pm.fcntl is None:
+            pytest.skip("fcntl not available")
+        fcntl = self.pm.fcntl
+        with self.pm._projects_write_lock():
+            # A separate open file description contends like another process would
+            with open(str(self.projects_file) + ".lock", "a") as other:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with open(str(self.projects_file) + ".lock", "a") as other:
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_registered_dids_are_cached(self, monkeypatch):
+        """Test that confirmed DIDs are not looked up on-chain again."""
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+        lookups = []
+        registered = {b"did:owner", b"did:dev"}
+
+        def is_did_registered(did_bytes):
+            lookups.append(did_bytes)
+            return did_bytes in registered
+
+        monkeypatch.setattr(self.fake_did_system, "is_did_registered", is_did_registered)
+        assert self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 1)
+        assert self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 1)
+        # Both were uncached, so they were looked up concurrently
+        assert sorted(lookups) == [b"did:dev", b"did:owner"]
+
+        # Unregistered DIDs are asked about every time
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:new", 1)
+        assert not self.pm.transfer_project_tokens("alpha", "did:owner", "did:new", 1)
+        assert lookups[2:] == [b"did:new", b"did:new"]
+
+    def test_uncached_dids_are_looked_up_concurrently(self, monkeypatch):
+        """Test that sender and receiver lookups overlap instead of running back to back."""
+        import threading
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+        both_started = threading.Barrier(2, timeout=5)
+
+        def is_did_registered(did_bytes):
+            # Fails with BrokenBarrierError if the lookups are sequential
+            both_started.wait()
+            return True
+
+        monkeypatch.setattr(self.fake_did_system, "is_did_registered", is_did_registered)
+        assert self.pm.transfer_project_tokens("alpha", "did:owner", "did:dev", 1)
+
+    def test_transfer_unknown_project(self):
+        """Test that transfers to a missing project fail."""
+        self._write_projects([self._project("alpha", {"did:owner": 10})])
+        assert not self.pm.transfer_project_tokens("gamma", "did:owner", "did:dev", 1)
+
+
+class TestSanitizeProjectName:
+    """Test project_id derivation from project names."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        try:
+            import project_management
+            self.pm = project_management
+        except ImportError:
+            pytest.skip("project_management module not available")
+
+    def test_sanitize_name(self):
+        """Test that names are lowercased and dash-separated."""
+        assert self.pm._sanitize_project_name_to_id("My Awesome Project!") == "my-awesome-project"
+        assert self.pm._sanitize_project_name_to_id(" Project with spaces ") == "project-with-spaces"
+        assert self.pm._sanitize_project_name_to_id("project_with_underscores") == "project_with_underscores"
+
+    def test_fallback_ids_are_unique(self):
+        """Test that unusable names get a fresh random ID every time."""
+        for name in ("", "!@#$%^"):
+            first = self.pm._sanitize_project_name_to_id(name)
+            second = self.pm._sanitize_project_name_to_id(name)
+            assert first.startswith("project-")
+            assert first != second
+
+
+class TestProjectEncoding:
+    """Test the specialized project JSON encoder."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test fixtures."""
+        try:
+            import project_management
+            self.pm = project_management
+        except ImportError:
+            pytest.skip("project_management module not available")
+
+    def _random_text(self, rng):
+        alphabet = "abcXYZ019 -_\"\\/\n\t\x00\x1féü€😀"
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+    def test_encode_project_matches_json_dumps(self):
+        """Fuzz the encoder against sorted-key json.dumps on random projects."""
+        import random
+        rng = random.Random(1234)
+        for _ in range(500):
+            project = {
+                "project_id": self._random_text(rng),
+                "project_name": self._random_text(rng),
+                "owner_did": self._random_text(rng),
+                "repo_cid": self._random_text(rng),
+                "token_name": self._random_text(rng),
+                "token_supply": rng.choice([0, 1, 10 ** 6, 2 ** 70, -5]),
+                "token_ledger": {
+                    self._random_text(rng): rng.randint(0, 10 ** 20)
+                    for _ in range(rng.randint(0, 5))
+                },
+            }
+            assert self.pm._encode_project(project) == json.dumps(project, sort_keys=True)
+
+    def test_new_ledger_holds_only_owner(self):
+        """Test that the pre-sized ledger contains just the owner's supply."""
+        ledger = self.pm._new_ledger("did:owner", 500)
+        assert ledger == {"did:owner": 500}
+        assert json.dumps(ledger) == '{"did:owner": 500}'
+
+    def test_encode_project_other_shapes(self):
+        """Test that records outside the fixed schema still encode correctly."""
+        extra = {"project_id": "a", "token_ledger": {}, "extra": [1, None]}
+        assert self.pm._encode_project(extra) == json.dumps(extra, sort_keys=True)
+        odd_types = {k: None for k in self.pm._PROJECT_KEYS}
+        assert self.pm._encode_project(odd_types) == json.dumps(odd_types, sort_keys=True)